@@ -7,14 +7,18 @@ It provides real-time monitoring of device status, including:
 - Device information and metrics
 - Real-time updates via WebSocket connection
 """
+import asyncio
 import logging
+from functools import partial
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback, ServiceCall
-from homeassistant.helpers.device_registry import DeviceEntry, DeviceRegistry, async_get as async_get_device_registry
-from homeassistant.helpers.entity_registry import EntityRegistry, async_get as async_get_entity_registry
+from homeassistant.helpers.device_registry import async_get as async_get_device_registry
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
 from homeassistant.const import ATTR_ENTITY_ID
 
-from .const import DOMAIN, LOGGER_NAME, DEFAULT_NAME, DeviceMode
+from .common import LeakomaticEntryRuntime
+from .const import DOMAIN, LOGGER_NAME, DEFAULT_NAME, WS_BATCH_WINDOW, WS_QUEUE_MAXSIZE, MODE_VALUES
 from .leakomatic_client import LeakomaticClient
 
 # Set up logger
@@ -22,9 +26,88 @@ _LOGGER = logging.getLogger(LOGGER_NAME)
 
 PLATFORMS = ["sensor", "binary_sensor", "select", "button"]
 
-async def handle_ws_message(message: dict) -> None:
-    """Handle websocket messages by passing them to the sensor callback."""
-    _LOGGER.debug("Received websocket message: %s", message)
+# Optional device data fields used for the device entry:
+# (key in device data, description used when it is missing, default)
+_DEVICE_DATA_FIELDS = (
+    ("model_name", "model", "Unknown"),
+    ("location", "location", None),
+    ("product_id", "product id", None),
+)
+
+def _ws_message_key(message: dict) -> tuple | int:
+    """Return the key used to coalesce websocket messages within a batch.
+    
+    Messages for the same device and operation supersede each other, except
+    alarms and analog readings which are also keyed on their alarm/sensor type.
+    Messages without an operation or with a malformed body are never coalesced.
+    
+    Only the latest message of a key survives a batch, so a transition that is
+    reverted within WS_BATCH_WINDOW (e.g. flow 1 -> 0 -> 1) is not seen by the
+    entities. This is accepted since the entities only expose the current state.
+    """
+    body = message.get("message")
+    if not isinstance(body, dict) or "operation" not in body:
+        return id(message)
+    data = body.get("data")
+    if not isinstance(data, dict):
+        return id(message)
+    return (
+        body["operation"],
+        data.get("device_id"),
+        data.get("alarm_type"),
+        data.get("sensor_type"),
+    )
+
+async def _ws_drain_loop(queue: asyncio.Queue, ws_callbacks: list) -> None:
+    """Drain queued websocket messages in batches and fan them out to the platforms.
+    
+    After the first message of a batch arrives, the loop waits WS_BATCH_WINDOW
+    seconds to let a burst accumulate, drops messages superseded by a newer one
+    with the same key and then schedules every platform callback once per message.
+    
+    Args:
+        queue: The queue the websocket client puts received messages on
+        ws_callbacks: The platform callbacks to pass each message to
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await queue.get()
+        await asyncio.sleep(WS_BATCH_WINDOW)
+        
+        batch: dict[tuple | int, dict] = {}
+        while True:
+            try:
+                key = _ws_message_key(message)
+            except Exception as e:
+                # Never let a malformed message stop the drain loop
+                _LOGGER.error("Error coalescing WebSocket message: %s", str(e))
+                key = id(message)
+            # Re-insert so the batch keeps the order of the latest messages
+            batch.pop(key, None)
+            batch[key] = message
+            try:
+                message = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+        
+        # Schedule the callbacks on the event loop rather than calling them
+        # inline, so a slow platform callback does not hold up the drain loop.
+        # Errors raised by a callback are reported by the event loop and do not
+        # reach this task
+        for message in batch.values():
+            for ws_callback in ws_callbacks:
+                loop.call_soon(ws_callback, message)
+
+def _ws_enqueue(queue: asyncio.Queue, message: dict) -> None:
+    """Queue a received websocket message for the drain loop.
+    
+    Messages are dropped with a warning when the queue is full, so a stalled
+    drain loop cannot grow the queue without bound.
+    """
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        _LOGGER.warning("WebSocket message queue is full, dropping message")
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Leakomatic from a config entry.
@@ -50,12 +133,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     # Store the client in hass.data
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {
-        "client": client,
-        "device_ids": [],  # Will be set after authentication
-        "device_entries": {},  # Will store device entries by device_id
-        "device_infos": {},  # Will store device info by device_id
-    }
+    entry_data = hass.data[DOMAIN][entry.entry_id] = LeakomaticEntryRuntime(client=client)
     
     # Authenticate to get the device IDs
     auth_success = await client.async_authenticate()
@@ -70,21 +148,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         return False
     
     # Store the device IDs
-    hass.data[DOMAIN][entry.entry_id]["device_ids"] = device_ids
+    entry_data.device_ids = device_ids
 
-    # Fetch initial device data for all devices
-    device_data = await client.async_get_device_data()
+    # Fetch initial device data and the websocket token concurrently, both
+    # only depend on a successful authentication
+    device_data, ws_token = await asyncio.gather(
+        client.async_get_device_data(),
+        client.async_get_websocket_token(),
+    )
     if not device_data:
         _LOGGER.error("Failed to fetch device data")
         return False
 
-    # Create device entries for each device
+    # Resolve the registries once for the device setup and the service
     device_registry = async_get_device_registry(hass)
+    entity_registry = async_get_entity_registry(hass)
     
     # If we got data for a single device, convert it to a dict
     if isinstance(device_data, dict) and "device_identifier" in device_data:
         device_data = {device_ids[0]: device_data}
     
+    # Keep the initial device data for the platforms
+    entry_data.device_data = device_data
+    
+    # Create device entries for each device
     for device_id in device_ids:
         # Get data for this specific device
         dev_data = device_data.get(device_id)
@@ -93,181 +180,188 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             continue
 
         # Store the device_identifier (serial number) if available
-        device_identifier = None
-        if "device_identifier" in dev_data:
-            device_identifier = dev_data["device_identifier"]
-        else:
+        device_identifier = dev_data.get("device_identifier")
+        if device_identifier is None:
             _LOGGER.warning("%s: No device identifier found in device data", device_id)
             continue
         
-        name = f"{DEFAULT_NAME} {device_id}"
-        if "name" in dev_data:
-            name = dev_data["name"]
-        else:
+        name = dev_data.get("name")
+        if name is None:
+            name = f"{DEFAULT_NAME} {device_id}"
             _LOGGER.warning("%s: Could not find name in device data, using %s", device_id, name)
         
         # If device data is available and contains sw_version, use it
-        sw_version = "Unknown"
-        if "sw_version" in dev_data and "sw_release" in dev_data:
-            sw_version = f"{dev_data['sw_release']}-{dev_data['sw_version']}"
+        sw_release = dev_data.get("sw_release")
+        sw_version = dev_data.get("sw_version")
+        if sw_release is not None and sw_version is not None:
+            sw_version = f"{sw_release}-{sw_version}"
         else:
+            sw_version = "Unknown"
             _LOGGER.warning("%s: Could not find software version in device data", device_id)
 
-        model = "Unknown"
-        if "model_name" in dev_data:
-            model = dev_data["model_name"]
-        else:
-            _LOGGER.warning("%s: Could not find model in device data", device_id)
-
-        location = None
-        if "location" in dev_data:
-            location = dev_data["location"]
-        else:
-            _LOGGER.warning("%s: Could not find location in device data", device_id)
-
-        model_id = None
-        if "product_id" in dev_data:
-            model_id = dev_data["product_id"]
-        else:
-            _LOGGER.warning("%s: Could not find product id in device data", device_id)
+        # Read the remaining optional fields, falling back to their defaults
+        fields = {}
+        for key, description, default in _DEVICE_DATA_FIELDS:
+            value = dev_data.get(key)
+            if value is None:
+                _LOGGER.warning("%s: Could not find %s in device data", device_id, description)
+                value = default
+            fields[key] = value
+        model = fields["model_name"]
+        location = fields["location"]
+        model_id = fields["product_id"]
 
-        _LOGGER.debug("Creating device entry for device %s with name '%s' in suggested area '%s'. Model: %s, Product ID: %s, Software version: %s, Device identifier: %s", device_id, name, location, model, model_id, sw_version, device_identifier)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Creating device entry for device %s with name '%s' in suggested area '%s'. Model: %s, Product ID: %s, Software version: %s, Device identifier: %s", device_id, name, location, model, model_id, sw_version, device_identifier)
         
-        # Create device entry
-        identifiers = {(DOMAIN, str(device_id))}
-        device_entry = device_registry.async_get_or_create(
-            config_entry_id=entry.entry_id,
-            identifiers=identifiers,
-            name=name,
-            manufacturer="Leakomatic",
-            model=model,
-            sw_version=sw_version,
-            suggested_area=location,
-            serial_number=device_identifier,
-            model_id=model_id
-        )
+        # Create device entry. Device IDs are already strings (parsed from the
+        # account page), so the same identifier is used for the registry and
+        # the device info
+        identifiers = {(DOMAIN, device_id)}
+        
+        # Reuse the existing device entry if it already belongs to this config
+        # entry and is up to date, otherwise create or update it
+        device_entry = device_registry.async_get_device(identifiers=identifiers)
+        if (
+            device_entry is None
+            or entry.entry_id not in device_entry.config_entries
+            or (
+                device_entry.name, device_entry.model, device_entry.sw_version,
+                device_entry.suggested_area, device_entry.serial_number, device_entry.model_id,
+            ) != (name, model, sw_version, location, device_identifier, model_id)
+        ):
+            device_entry = device_registry.async_get_or_create(
+                config_entry_id=entry.entry_id,
+                identifiers=identifiers,
+                name=name,
+                manufacturer="Leakomatic",
+                model=model,
+                sw_version=sw_version,
+                suggested_area=location,
+                serial_number=device_identifier,
+                model_id=model_id
+            )
         
-        # Store the device entry
-        hass.data[DOMAIN][entry.entry_id]["device_entries"][device_id] = device_entry
+        # Store the device entry and index it by its Home Assistant device id
+        entry_data.device_entries[device_id] = device_entry
+        entry_data.leakomatic_device_ids[device_entry.id] = device_id
 
-        # Create device info dictionary using the device entry's information
-        device_info = {
-            "identifiers": {(DOMAIN, device_id)},
-            "name": device_entry.name,
-            "manufacturer": device_entry.manufacturer,
-            "model": device_entry.model,
-            "sw_version": device_entry.sw_version,
-            "serial_number": device_identifier,  # Add the device identifier for easy access
-        }
+        # Create the device info using the device entry's information, shared by all entities of the device
+        device_info = DeviceInfo(
+            identifiers=identifiers,
+            name=device_entry.name,
+            manufacturer=device_entry.manufacturer,
+            model=device_entry.model,
+            sw_version=device_entry.sw_version,
+            serial_number=device_identifier,  # Add the device identifier for easy access
+        )
         
         # Store the device info in hass.data
-        hass.data[DOMAIN][entry.entry_id]["device_infos"][device_id] = device_info
+        entry_data.device_infos[device_id] = device_info
     
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Get the websocket token
-    ws_token = await client.async_get_websocket_token()
     if not ws_token:
         _LOGGER.warning("Could not get websocket token, websocket functionality will not be available")
 
     # Start websocket connection after platforms are set up
     if ws_token:
+        # Received messages are queued and fanned out to the platform callbacks
+        # in batches by the drain loop, keeping the receive path O(1)
+        ws_queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=WS_QUEUE_MAXSIZE)
+        entry_data.ws_drain_task = hass.async_create_background_task(
+            _ws_drain_loop(ws_queue, entry_data.ws_callbacks),
+            "Leakomatic WebSocket Drain"
+        )
+
         # Create a background task for the websocket connection
-        hass.async_create_background_task(
-            client.connect_to_websocket(
-                ws_token,
-                lambda msg: [
-                    callback(msg) for callback in 
-                    hass.data[DOMAIN][entry.entry_id].get("ws_callbacks", [])
-                ]
-            ),
+        entry_data.ws_task = hass.async_create_background_task(
+            client.connect_to_websocket(ws_token, partial(_ws_enqueue, ws_queue)),
             "Leakomatic WebSocket Connection"
         )
         _LOGGER.debug("Started websocket connection task")
     
-    # Register the change_mode service
-    async def async_change_mode(call: ServiceCall) -> None:
-        """Change the mode of a Leakomatic device.
+    # Register the change_mode service once, it serves the devices of all
+    # config entries
+    if not hass.services.has_service(DOMAIN, "change_mode"):
+        async def async_change_mode(call: ServiceCall) -> None:
+            """Change the mode of a Leakomatic device.
         
-        Args:
-            call: The service call data
-        """
-        mode = call.data.get("mode")
+            Args:
+                call: The service call data
+            """
+            mode = call.data.get("mode")
         
-        if not mode:
-            _LOGGER.error("Missing required parameter: mode")
-            return
+            if not mode:
+                _LOGGER.error("Missing required parameter: mode")
+                return
             
-        # Validate the mode
-        try:
-            # This will raise ValueError if the mode is invalid
-            DeviceMode.from_string(mode)
-        except ValueError as err:
-            _LOGGER.error("Invalid mode: %s", err)
-            return
+            # Validate and normalize the mode
+            mode = mode.lower()
+            if mode not in MODE_VALUES:
+                _LOGGER.error("Invalid mode: %s. Must be one of: %s", mode, ", ".join(MODE_VALUES))
+                return
             
-        # Get the entity registry using the proper import
-        entity_registry = async_get_entity_registry(hass)
-        
-        # Get entity IDs - first check target, then fall back to data
-        entity_ids = None
-        if hasattr(call, "target") and call.target and ATTR_ENTITY_ID in call.target:
-            entity_ids = call.target[ATTR_ENTITY_ID]
-        else:
+            # Get entity IDs, Home Assistant merges the entity_id of the service
+            # target into the call data
             entity_ids = call.data.get(ATTR_ENTITY_ID)
             
-        if not entity_ids:
-            _LOGGER.error("Missing required parameter: entity_id")
-            return
+            if not entity_ids:
+                _LOGGER.error("Missing required parameter: entity_id")
+                return
             
-        # Convert to list if it's a string
-        if isinstance(entity_ids, str):
-            entity_ids = [entity_ids]
+            # Convert to a tuple if it's a single string
+            entity_ids = (entity_ids,) if isinstance(entity_ids, str) else tuple(entity_ids)
             
-        # Get the client from hass.data
-        client = hass.data[DOMAIN][entry.entry_id]["client"]
+            # Look up entities directly in the registry's entity index
+            entities = entity_registry.entities
         
-        # Change mode for each entity
-        for entity_id in entity_ids:
-            # Get the entity from the registry
-            entity = entity_registry.async_get(entity_id)
-            if not entity:
-                _LOGGER.error("Entity not found: %s", entity_id)
-                continue
-                
-            # Extract device_id from the entity's device_id
-            device_id = entity.device_id
-            if not device_id:
-                _LOGGER.error("Entity %s has no device_id", entity_id)
-                continue
+            # Group the targeted entities by config entry and Leakomatic device, since
+            # the mode is a device-level setting and should only be changed once per device
+            targets: dict[tuple[str, str], list[str]] = {}
+            for entity_id in entity_ids:
+                # Get the entity from the registry
+                entity = entities.get(entity_id)
+                if not entity:
+                    _LOGGER.error("Entity not found: %s", entity_id)
+                    continue
                 
-            # Get the device entry to find the Leakomatic device_id
-            device_entry = device_registry.async_get(device_id)
-            if not device_entry:
-                _LOGGER.error("Device entry not found for %s", device_id)
-                continue
+                # Extract device_id from the entity's device_id
+                device_id = entity.device_id
+                if not device_id:
+                    _LOGGER.error("Entity %s has no device_id", entity_id)
+                    continue
                 
-            # Find the Leakomatic device_id from the identifiers
-            leakomatic_device_id = None
-            for identifier in device_entry.identifiers:
-                if identifier[0] == DOMAIN:
-                    leakomatic_device_id = identifier[1]
-                    break
-                    
-            if not leakomatic_device_id:
-                _LOGGER.error("Could not find Leakomatic device_id for %s", device_id)
-                continue
+                # Get the runtime data of the config entry the entity belongs to
+                target_data = hass.data.get(DOMAIN, {}).get(entity.config_entry_id)
+                if target_data is None:
+                    _LOGGER.error("Config entry for %s is not loaded", entity_id)
+                    continue
                 
-            # Change the mode
-            success = await client.async_change_mode(mode, leakomatic_device_id)
-            if success:
-                _LOGGER.info("Successfully changed mode to %s for device %s", mode, leakomatic_device_id)
-            else:
-                _LOGGER.error("Failed to change mode for device %s", leakomatic_device_id)
+                # Find the Leakomatic device_id from the device index built during setup
+                leakomatic_device_id = target_data.leakomatic_device_ids.get(device_id)
+                if not leakomatic_device_id:
+                    _LOGGER.error("Could not find Leakomatic device_id for %s", device_id)
+                    continue
+            
+                targets.setdefault((entity.config_entry_id, leakomatic_device_id), []).append(entity_id)
+        
+            # Change the mode once for each device, using the client of the config
+            # entry the device belongs to
+            items = list(targets.items())
+            results = await asyncio.gather(*(
+                hass.data[DOMAIN][config_entry_id].client.async_change_mode(mode, leakomatic_device_id)
+                for (config_entry_id, leakomatic_device_id), _ in items
+            ))
+            for ((_, leakomatic_device_id), device_entity_ids), success in zip(items, results):
+                if success:
+                    _LOGGER.info("Successfully changed mode to %s for device %s (%s)", mode, leakomatic_device_id, ", ".join(device_entity_ids))
+                else:
+                    _LOGGER.error("Failed to change mode for device %s (%s)", leakomatic_device_id, ", ".join(device_entity_ids))
     
-    # Register the service
-    hass.services.async_register(DOMAIN, "change_mode", async_change_mode)
+        # Register the service
+        hass.services.async_register(DOMAIN, "change_mode", async_change_mode)
     
     _LOGGER.info("Leakomatic integration setup completed")
     return True
@@ -290,17 +384,29 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.debug("Unloading Leakomatic integration with config entry: %s", entry.entry_id)
     
     # Stop the websocket connection
-    if entry.entry_id in hass.data[DOMAIN]:
-        client = hass.data[DOMAIN][entry.entry_id].get("client")
-        if client:
-            await client.stop_websocket()
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is not None:
+        # Cancel the websocket and drain tasks and wait for them to finish, so
+        # no reconnection attempt can race with the shutdown
+        ws_tasks = [task for task in (entry_data.ws_task, entry_data.ws_drain_task) if task]
+        for task in ws_tasks:
+            task.cancel()
+        await asyncio.gather(*ws_tasks, return_exceptions=True)
+        
+        await entry_data.client.stop_websocket()
     
     # Unload platforms
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
-    # Remove the entry from hass.data
+    # Remove the entry from hass.data and close the client
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if entry_data is not None:
+            await entry_data.client.async_close()
+        
+        # Remove the shared service when the last entry is unloaded
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, "change_mode")
     
     _LOGGER.info("Leakomatic integration unloaded successfully for %s", entry.entry_id)
     
@@ -8,6 +8,8 @@ It provides binary sensors for:
 from __future__ import annotations
 
 import logging
+import time
+from functools import partial
 from typing import Any, Callable, Dict, Optional
 from datetime import datetime, timezone
 
@@ -19,127 +21,54 @@ from homeassistant.components.binary_sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import DOMAIN, MessageType
 from .common import LeakomaticEntity, MessageHandlerRegistry, LeakomaticMessageHandler, log_with_entity
 
 _LOGGER = logging.getLogger(__name__)
 
+# Bit 7 of the port state is set while the valve is closed
+_VALVE_CLOSED_MASK = 0x80
+
+def _parse_last_seen(value: str) -> datetime:
+    """Parse an API last_seen_at timestamp, dropping microseconds for a consistent format.
+    
+    The Python versions supported by Home Assistant parse the trailing "Z" natively,
+    so the timestamp is passed to fromisoformat as-is.
+    """
+    return datetime.fromisoformat(value).replace(microsecond=0)
+
 class LeakomaticBinarySensor(LeakomaticEntity, BinarySensorEntity):
     """Base class for all Leakomatic binary sensors.
     
     This class implements common functionality shared between all Leakomatic binary sensors.
+    Subclasses declare their constant device class and entity category as class attributes.
     """
 
-    def __init__(
-        self,
-        device_info: dict[str, Any],
-        device_id: str,
-        device_data: dict[str, Any] | None,
-        *,
-        key: str,
-        icon: str,
-        device_class: BinarySensorDeviceClass | None = None,
-    ) -> None:
-        """Initialize the binary sensor."""
-        super().__init__(
-            device_info=device_info,
-            device_id=device_id,
-            device_data=device_data,
-            key=key,
-            icon=icon,
-        )
-        self._attr_device_class = device_class
-
-# Create a global registry instance
-message_registry = MessageHandlerRegistry[LeakomaticBinarySensor]()
-
-# Define message handlers
-def handle_flow_update(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle flow_updated messages."""
-    LeakomaticMessageHandler.handle_flow_update(
-        message, 
-        sensors, 
-        FlowIndicatorBinarySensor, 
-        OnlineStatusBinarySensor
-    )
-
-def handle_device_update(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle device_updated messages."""
-    LeakomaticMessageHandler.handle_device_update(
-        message, 
-        sensors, 
-        FlowIndicatorBinarySensor, 
-        OnlineStatusBinarySensor
-    )
-
-def handle_quick_test_update(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle quick_test_updated messages."""
-    LeakomaticMessageHandler.handle_quick_test_update(
-        message, 
-        sensors, 
-        None,  # No quick test binary sensor
-        OnlineStatusBinarySensor
-    )
-
-def handle_tightness_test_update(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle tightness_test_updated messages."""
-    LeakomaticMessageHandler.handle_tightness_test_update(
-        message, 
-        sensors, 
-        None,  # No tightness test binary sensor
-        OnlineStatusBinarySensor
-    )
-
-def handle_status_update(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle status_message messages."""
-    LeakomaticMessageHandler.handle_status_update(
-        message, 
-        sensors, 
-        ValveBinarySensor, 
-        OnlineStatusBinarySensor
-    )
-
-def handle_ping(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle ping messages."""
-    LeakomaticMessageHandler.handle_ping(
-        message, 
-        sensors, 
-        OnlineStatusBinarySensor
-    )
+    @callback
+    def handle_update(self, data: dict[str, Any]) -> None:
+        """Handle updated data from WebSocket."""
+        self._device_data = data
+        is_on = self._recompute(data)
+        if is_on == self._attr_is_on:
+            return
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated from %s to %s",
+                          self._state_label(self._attr_is_on), self._state_label(is_on))
+        self._attr_is_on = is_on
+        self.async_write_ha_state()
 
-def handle_device_offline(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle device_offline messages."""
-    LeakomaticMessageHandler.handle_device_offline(
-        message, 
-        sensors, 
-        OnlineStatusBinarySensor
-    )
+    def _recompute(self, data: dict[str, Any]) -> bool:
+        """Return the state of the sensor for the data of an update."""
+        return bool(self._attr_is_on)
 
-def handle_alarm_triggered(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle alarm_triggered messages."""
-    LeakomaticMessageHandler.handle_alarm_triggered(
-        message, 
-        sensors, 
-        (),  # No alarm binary sensors
-        OnlineStatusBinarySensor
-    )
+    def _state_label(self, is_on: bool | None) -> Any:
+        """Return the state as shown in the debug log."""
+        return is_on
 
-def handle_default(message: dict, sensors: list[LeakomaticBinarySensor]) -> None:
-    """Handle any other message type."""
-    LeakomaticMessageHandler.handle_default(message, sensors)
-
-# Register all handlers
-message_registry.register(MessageType.FLOW_UPDATED.value, handle_flow_update)
-message_registry.register(MessageType.DEVICE_UPDATED.value, handle_device_update)
-message_registry.register(MessageType.QUICK_TEST_UPDATED.value, handle_quick_test_update)
-message_registry.register(MessageType.TIGHTNESS_TEST_UPDATED.value, handle_tightness_test_update)
-message_registry.register(MessageType.STATUS_MESSAGE.value, handle_status_update)
-message_registry.register(MessageType.PING.value, handle_ping)
-message_registry.register(MessageType.DEVICE_OFFLINE.value, handle_device_offline)
-message_registry.register(MessageType.ALARM_TRIGGERED.value, handle_alarm_triggered)
-message_registry.register_default(handle_default)
+# Create a global registry instance
+message_registry = MessageHandlerRegistry[LeakomaticBinarySensor]()
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -160,25 +89,21 @@ async def async_setup_entry(
     _LOGGER.debug("Setting up Leakomatic binary sensor for config entry: %s", config_entry.entry_id)
     
     # Get the client and device IDs from hass.data
-    domain_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id, {})
-    client = domain_data.get("client")
-    device_ids = domain_data.get("device_ids", [])
-    device_entries = domain_data.get("device_entries", {})
-    device_infos = domain_data.get("device_infos", {})
+    domain_data = hass.data[DOMAIN][config_entry.entry_id]
+    client = domain_data.client
+    device_ids = domain_data.device_ids
+    device_entries = domain_data.device_entries
+    device_infos = domain_data.device_infos
     
     if not client or not device_ids or not device_entries or not device_infos:
         _LOGGER.error("Missing client, device IDs, device entries, or device infos")
         return
     
-    # Get initial device data for all devices
-    device_data = await client.async_get_device_data()
+    # Get the initial device data fetched during integration setup
+    device_data = domain_data.device_data
     if not device_data:
         _LOGGER.error("Missing device data")
         return
-        
-    # If we got data for a single device, convert it to a dict
-    if isinstance(device_data, dict) and "device_identifier" in device_data:
-        device_data = {device_ids[0]: device_data}
     
     # Create binary sensors for each device
     all_binary_sensors = []
@@ -207,16 +132,15 @@ async def async_setup_entry(
     
     async_add_entities(all_binary_sensors)
 
-    # Register callback for WebSocket updates
-    @callback
-    def handle_ws_message(message: dict) -> None:
-        """Handle WebSocket messages."""
-        message_registry.handle_message(message, all_binary_sensors)
+    # Index the sensors by device identifier and type once so the message handlers
+    # go straight to the sensors of the message's device without isinstance checks
+    sensors_by_device: dict[str, dict[type, list[LeakomaticBinarySensor]]] = {}
+    for sensor in all_binary_sensors:
+        sensors_by_device.setdefault(sensor.device_info["serial_number"], {}).setdefault(type(sensor), []).append(sensor)
 
-    # Store the callback in hass.data for the WebSocket client to use
-    if "ws_callbacks" not in domain_data:
-        domain_data["ws_callbacks"] = []
-    domain_data["ws_callbacks"].append(handle_ws_message)
+    # Store the callback for WebSocket updates in hass.data for the WebSocket client to use,
+    # binding the entities directly to the registry to skip a forwarding call per message
+    domain_data.ws_callbacks.append(partial(message_registry.handle_message, entities=sensors_by_device))
 
     # Register connectivity callbacks for WebSocket connectivity sensors
     websocket_sensors = [sensor for sensor in all_binary_sensors if isinstance(sensor, WebSocketConnectivityBinarySensor)]
@@ -230,18 +154,18 @@ async def async_setup_entry(
         client.register_connectivity_callback(handle_connectivity_update)
 
 
-class FlowIndicatorBinarySensor(LeakomaticBinarySensor):
+class FlowIndicatorBinarySensor(LeakomaticBinarySensor, RestoreEntity):
     """Representation of a Leakomatic Flow Indicator binary sensor.
     
     This sensor indicates whether water is currently flowing (1) or not (0).
     It is updated through WebSocket updates.
     
     Note: There appears to be a bug in the API where flow_mode is always 1
-    regardless of actual water flow. Therefore, we initialize the sensor as
-    unknown and only update its state through WebSocket flow_updated events.
+    regardless of actual water flow. Therefore, we restore the state from before
+    the restart and only update it through WebSocket flow_updated events.
     
     Attributes:
-        _device_info: Information about the physical device
+        _attr_device_info: Information about the physical device
         _device_id: The unique identifier of the device
         _attr_name: The name of the sensor
         _attr_unique_id: The unique identifier for this sensor
@@ -249,6 +173,8 @@ class FlowIndicatorBinarySensor(LeakomaticBinarySensor):
         _device_data: The current device data
     """
 
+    _attr_device_class = BinarySensorDeviceClass.RUNNING
+
     def __init__(
         self,
         device_info: dict[str, Any],
@@ -256,45 +182,35 @@ class FlowIndicatorBinarySensor(LeakomaticBinarySensor):
         device_data: dict[str, Any] | None,
     ) -> None:
         """Initialize the flow indicator binary sensor."""
-        # Initialize with flow_mode = 0 since the API always sends 1 in initial data
-        if device_data is not None:
-            device_data = device_data.copy()
-            device_data["flow_mode"] = 0
-            
         super().__init__(
             device_info=device_info,
             device_id=device_id,
             device_data=device_data,
             key="flow_indicator",
             icon="mdi:water",
-            device_class=BinarySensorDeviceClass.RUNNING,
         )
-
-    @property
-    def is_on(self) -> bool:
-        """Return true if flow is detected."""
-        if not self._device_data:
-            return False
-        
-        # Get the flow mode value
-        flow_mode = self._device_data.get("flow_mode")
+        # Initialize as not flowing since the API always sends flow_mode 1 in initial data
+        self._attr_is_on = False
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known flow state."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        if last_state and last_state.state in ("on", "off"):
+            self._attr_is_on = last_state.state == "on"
+
+    def _recompute(self, data: dict[str, Any]) -> bool:
+        """Return true if the data reports flow."""
+        flow_mode = data.get("flow_mode")
         if flow_mode is not None:
             try:
                 return int(flow_mode) == 1
             except (ValueError, TypeError):
                 log_with_entity(_LOGGER, logging.WARNING, self, "Invalid value: %s", flow_mode)
-                return False
         
         return False
 
-    @callback
-    def handle_update(self, data: dict[str, Any]) -> None:
-        """Handle updated data from WebSocket."""
-        self._device_data = data
-        self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.is_on)
-
-class OnlineStatusBinarySensor(LeakomaticBinarySensor):
+class OnlineStatusBinarySensor(LeakomaticBinarySensor, RestoreEntity):
     """Representation of a Leakomatic Online Status binary sensor.
     
     This sensor indicates whether the device is currently online (True) or offline (False).
@@ -303,9 +219,13 @@ class OnlineStatusBinarySensor(LeakomaticBinarySensor):
     The sensor will be set to online (True) when receiving any message from the device.
     The sensor will be set to offline (False) when the device hasn't been seen for more than 5 minutes.
     
-    The default state is unknown (None) until the first update is received.
+    Until the first update is received, the state comes from the device data or,
+    if that has no online status, from the state before the restart.
     """
 
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
     def __init__(
         self,
         device_info: dict[str, Any],
@@ -319,49 +239,33 @@ class OnlineStatusBinarySensor(LeakomaticBinarySensor):
             device_data=device_data,
             key="online_status",
             icon="mdi:wifi",
-            device_class=BinarySensorDeviceClass.CONNECTIVITY,
         )
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_is_on = bool(self._device_data.get("is_online"))
+        self._restore_is_on = "is_online" not in self._device_data
         self._last_seen: datetime | None = None
         
         # If we have initial device data with last_seen_at, parse it
         if device_data and "last_seen_at" in device_data:
             try:
-                # Parse the ISO format timestamp from the device data
-                # Remove microseconds for consistent format
-                parsed_time = datetime.fromisoformat(device_data["last_seen_at"].replace("Z", "+00:00"))
-                self._last_seen = parsed_time.replace(microsecond=0)
+                self._last_seen = _parse_last_seen(device_data["last_seen_at"])
             except (ValueError, TypeError) as err:
                 log_with_entity(_LOGGER, logging.WARNING, self, "Failed to parse last_seen_at from device data: %s", err)
-
-    @property
-    def is_on(self) -> bool:
-        """Return true if device is online."""
-        if not self._device_data:
-            return False
-        
-        # Get the online status
-        is_online = self._device_data.get("is_online")
-        if is_online is not None:
-            try:
-                return bool(is_online)
-            except (ValueError, TypeError):
-                log_with_entity(_LOGGER, logging.WARNING, self, "Invalid value: %s", is_online)
-                return False
-        
-        return False
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        # Get base attributes from parent class
-        attrs = super().extra_state_attributes or {}
-        
-        # Add our custom last_seen attribute
-        if self._last_seen:
-            attrs["last_seen"] = self._last_seen.isoformat()
-        
-        return attrs
+        self._update_attributes()
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known online state if the device data did not report one."""
+        await super().async_added_to_hass()
+        if not self._restore_is_on:
+            return
+        last_state = await self.async_get_last_state()
+        if last_state and last_state.state in ("on", "off"):
+            self._attr_is_on = last_state.state == "on"
+
+    def _update_attributes(self) -> None:
+        """Rebuild the state attributes after last_seen changed."""
+        self._attr_extra_state_attributes = (
+            {"last_seen": self._last_seen.isoformat()} if self._last_seen else {}
+        )
 
     @callback
     def handle_update(self, data: dict[str, Any], update_last_seen: bool = True) -> None:
@@ -371,24 +275,32 @@ class OnlineStatusBinarySensor(LeakomaticBinarySensor):
             data: The data to update the sensor with
             update_last_seen: Whether to update the last_seen timestamp
         """
+        previous_last_seen = self._last_seen
+        
         # Update last_seen based on the data or current time
         if update_last_seen:
             if "last_seen_at" in data:
                 try:
-                    # Parse the ISO format timestamp from the device data
-                    # Remove microseconds for consistent format
-                    parsed_time = datetime.fromisoformat(data["last_seen_at"].replace("Z", "+00:00"))
-                    self._last_seen = parsed_time.replace(microsecond=0)
+                    self._last_seen = _parse_last_seen(data["last_seen_at"])
                 except (ValueError, TypeError) as err:
                     log_with_entity(_LOGGER, logging.WARNING, self, "Failed to parse last_seen_at from device data: %s", err)
                     # Fall back to current time if parsing fails
-                    self._last_seen = datetime.now(timezone.utc).replace(microsecond=0)
+                    self._last_seen = datetime.fromtimestamp(int(time.time()), timezone.utc)
             else:
                 # If no last_seen_at in data, use current time
-                self._last_seen = datetime.now(timezone.utc).replace(microsecond=0)
+                self._last_seen = datetime.fromtimestamp(int(time.time()), timezone.utc)
             
         self._device_data = data
+        is_on = bool(data.get("is_online"))
+        # Most messages only re-confirm the device is online within the same second
+        if is_on == self._attr_is_on and self._last_seen == previous_last_seen:
+            return
+        self._attr_is_on = is_on
+        if self._last_seen != previous_last_seen:
+            self._update_attributes()
         self.async_write_ha_state()
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self._attr_is_on)
 
 class ValveBinarySensor(LeakomaticBinarySensor):
     """Representation of a Leakomatic Valve binary sensor.
@@ -401,6 +313,8 @@ class ValveBinarySensor(LeakomaticBinarySensor):
     - If bit 7 is 0 → valve is open
     """
 
+    _attr_device_class = BinarySensorDeviceClass.OPENING
+
     def __init__(
         self,
         device_info: dict[str, Any],
@@ -414,44 +328,23 @@ class ValveBinarySensor(LeakomaticBinarySensor):
             device_data=device_data,
             key="valve",
             icon="mdi:valve",
-            device_class=BinarySensorDeviceClass.OPENING,
         )
-        self._previous_state: bool | None = None
+        self._attr_is_on = self._recompute(self._device_data)
 
-    @property
-    def is_on(self) -> bool:
-        """Return true if valve is open."""
-        if not self._device_data:
-            return False
-        
-        # Get the port state value
-        port_state = self._device_data.get("port_state")
+    def _recompute(self, data: dict[str, Any]) -> bool:
+        """Return true if the port state in the data reports the valve as open."""
+        port_state = data.get("port_state")
         if port_state is not None:
             try:
-                port_state_int = int(port_state)
-                # Check if bit 7 is 0 (valve is open)
-                is_open = (port_state_int & (1 << 7)) == 0
-                
-                # Only log if the state has changed
-                if is_open != self._previous_state:
-                    log_with_entity(_LOGGER, logging.DEBUG, self, "Valve updated from %s to %s", 
-                                  "open" if self._previous_state else "closed" if self._previous_state is not None else "unknown",
-                                  "open" if is_open else "closed")
-                    self._previous_state = is_open
-                
-                return is_open
+                return not int(port_state) & _VALVE_CLOSED_MASK
             except (ValueError, TypeError):
                 log_with_entity(_LOGGER, logging.WARNING, self, "Invalid port state value: %s", port_state)
-                return False
         
         return False
 
-    @callback
-    def handle_update(self, data: dict[str, Any]) -> None:
-        """Handle updated data from WebSocket."""
-        self._device_data = data
-        self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.is_on)
+    def _state_label(self, is_on: bool | None) -> str:
+        """Return the valve state as shown in the debug log."""
+        return "open" if is_on else "closed"
 
 class WebSocketConnectivityBinarySensor(LeakomaticBinarySensor):
     """Representation of a Leakomatic WebSocket Connectivity binary sensor.
@@ -466,6 +359,10 @@ class WebSocketConnectivityBinarySensor(LeakomaticBinarySensor):
     without having to check logs.
     """
 
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_name = "WebSocket Connectivity"
+
     def __init__(
         self,
         device_info: dict[str, Any],
@@ -479,32 +376,17 @@ class WebSocketConnectivityBinarySensor(LeakomaticBinarySensor):
             device_data=device_data,
             key="websocket_connectivity",
             icon="mdi:webhook",
-            device_class=BinarySensorDeviceClass.CONNECTIVITY,
         )
-        self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._attr_name = "WebSocket Connectivity"
         self._websocket_connected = False
         self._reconnection_phase = 1
         self._last_connection_change: datetime | None = None
+        self._attr_extra_state_attributes = {"reconnection_phase": self._reconnection_phase}
 
     @property
     def is_on(self) -> bool:
         """Return true if WebSocket is connected."""
         return self._websocket_connected
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        # Get base attributes from parent class
-        attrs = super().extra_state_attributes or {}
-        
-        # Add our custom attributes
-        attrs["reconnection_phase"] = self._reconnection_phase
-        if self._last_connection_change:
-            attrs["last_connection_change"] = self._last_connection_change.isoformat()
-        
-        return attrs
-
     @callback
     def update_connectivity_status(self, connected: bool, phase: int = 1) -> None:
         """Update the WebSocket connectivity status.
@@ -516,9 +398,44 @@ class WebSocketConnectivityBinarySensor(LeakomaticBinarySensor):
         if self._websocket_connected != connected or self._reconnection_phase != phase:
             self._websocket_connected = connected
             self._reconnection_phase = phase
-            self._last_connection_change = datetime.now(timezone.utc).replace(microsecond=0)
+            self._last_connection_change = datetime.fromtimestamp(int(time.time()), timezone.utc)
+            self._attr_extra_state_attributes = {
+                "reconnection_phase": phase,
+                "last_connection_change": self._last_connection_change.isoformat(),
+            }
             self.async_write_ha_state()
             
             status_text = "connected" if connected else "disconnected"
             log_with_entity(_LOGGER, logging.INFO, self, 
-                           "WebSocket %s (Phase %d)", status_text, phase) 
\ No newline at end of file
+                           "WebSocket %s (Phase %d)", status_text, phase) 
+
+# Message types handled by the shared indexed update:
+# (message type, sensor type to pass the message data to or None,
+#  whether marking the device online also updates last_seen)
+_INDEXED_HANDLERS: tuple[tuple[str, type | None, bool], ...] = (
+    (MessageType.FLOW_UPDATED.value, FlowIndicatorBinarySensor, True),
+    (MessageType.DEVICE_UPDATED.value, FlowIndicatorBinarySensor, True),
+    (MessageType.QUICK_TEST_UPDATED.value, None, True),  # No quick test binary sensor
+    (MessageType.TIGHTNESS_TEST_UPDATED.value, None, True),  # No tightness test binary sensor
+    (MessageType.STATUS_MESSAGE.value, ValveBinarySensor, True),
+    (MessageType.DEVICE_OFFLINE.value, None, False),
+    (MessageType.ALARM_TRIGGERED.value, None, True),  # No alarm binary sensors
+)
+
+# Register all handlers, binding the sensor types so each message dispatches straight
+# to the shared handler without a per-platform wrapper frame
+for _message_type, _sensor_type, _update_last_seen in _INDEXED_HANDLERS:
+    message_registry.register(
+        _message_type,
+        partial(
+            LeakomaticMessageHandler._update_indexed_entities,
+            sensor_type=_sensor_type,
+            online_sensor_type=OnlineStatusBinarySensor,
+            update_last_seen=_update_last_seen,
+        ),
+    )
+message_registry.register(
+    MessageType.PING.value,
+    partial(LeakomaticMessageHandler.handle_ping, online_sensor_type=OnlineStatusBinarySensor),
+)
+message_registry.register_default(LeakomaticMessageHandler.handle_default)
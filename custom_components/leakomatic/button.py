@@ -64,11 +64,11 @@ async def async_setup_entry(
     _LOGGER.debug("Setting up Leakomatic buttons for config entry: %s", config_entry.entry_id)
     
     # Get the device IDs and device entries from hass.data
-    domain_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id, {})
-    device_ids = domain_data.get("device_ids", [])
-    device_entries = domain_data.get("device_entries", {})
-    device_infos = domain_data.get("device_infos", {})
-    client = domain_data.get("client")
+    domain_data = hass.data[DOMAIN][config_entry.entry_id]
+    device_ids = domain_data.device_ids
+    device_entries = domain_data.device_entries
+    device_infos = domain_data.device_infos
+    client = domain_data.client
     
     if not device_ids or not device_entries or not device_infos or not client:
         _LOGGER.error("Missing device IDs, device entries, device infos, or client")
@@ -4,16 +4,50 @@ This module contains shared code used by both sensor and binary_sensor platforms
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, Optional, TypeVar, Generic, Type, Union
 
+from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.entity import DeviceInfo
 
+from .leakomatic_client import LeakomaticClient
+
 _LOGGER = logging.getLogger(__name__)
 
 # Type variable for the entity type
 T = TypeVar('T')
 
+# The entities passed to message handlers, either as a list or indexed by device identifier and entity type
+Entities = Union[list[T], dict[str, dict[type, list[T]]]]
+
+@dataclass(slots=True)
+class LeakomaticEntryRuntime:
+    """Runtime data stored in hass.data for each Leakomatic config entry.
+    
+    Attributes:
+        client: The Leakomatic client for the config entry
+        device_ids: The Leakomatic device IDs of the account
+        device_entries: The device registry entries by device_id
+        leakomatic_device_ids: The Leakomatic device_id by device registry id
+        device_infos: The device info dicts by device_id
+        device_data: The device data fetched during setup by device_id
+        ws_callbacks: The platform callbacks to pass websocket messages to
+        ws_drain_task: The task fanning out queued websocket messages
+        ws_task: The task running the websocket connection
+    """
+
+    client: LeakomaticClient
+    device_ids: list[str] = field(default_factory=list)
+    device_entries: dict[str, DeviceEntry] = field(default_factory=dict)
+    leakomatic_device_ids: dict[str, str] = field(default_factory=dict)
+    device_infos: dict[str, DeviceInfo] = field(default_factory=dict)
+    device_data: dict[str, dict[str, Any]] = field(default_factory=dict)
+    ws_callbacks: list[Callable[[dict], None]] = field(default_factory=list)
+    ws_drain_task: asyncio.Task | None = None
+    ws_task: asyncio.Task | None = None
+
 def log_with_entity(logger: logging.Logger, level: int, entity: Any, message: str, *args: Any) -> None:
     """Log a message with device and entity names.
     
@@ -56,7 +90,7 @@ class LeakomaticMessageHandler:
             update_data: Data to pass to handle_update. If None, uses message data
             update_last_seen: Whether to update last_seen for online status
         """
-        data = message.get("message", {}).get("data", {})
+        data = (message.get("message") or {}).get("data") or {}
         message_device_identifier = data.get("device_id")
         
         for entity in entities:
@@ -71,6 +105,35 @@ class LeakomaticMessageHandler:
             if online_sensor_type is not None and isinstance(entity, online_sensor_type):
                 entity.handle_update({"is_online": True}, update_last_seen=update_last_seen)
     
+    @staticmethod
+    def _update_indexed_entities(
+        message: dict,
+        entities: dict[str, dict[type, list[T]]],
+        sensor_type: Type[T] | None,
+        online_sensor_type: Type[T] | None,
+        update_data: dict[str, Any] | None = None,
+        update_last_seen: bool = True
+    ) -> None:
+        """Helper method to update the entities of the message's device from an index.
+        
+        Args:
+            message: The message containing the update
+            entities: Entities indexed by device identifier and entity type
+            sensor_type: Type of sensor to update
+            online_sensor_type: Type of online sensor to update
+            update_data: Data to pass to handle_update. If None, uses message data
+            update_last_seen: Whether to update last_seen for online status
+        """
+        data = (message.get("message") or {}).get("data") or {}
+        device_entities = entities.get(data.get("device_id"))
+        if device_entities is None:
+            return
+        
+        for entity in device_entities.get(sensor_type, ()):
+            entity.handle_update(update_data or data)
+        for entity in device_entities.get(online_sensor_type, ()):
+            entity.handle_update({"is_online": True}, update_last_seen=update_last_seen)
+    
     @staticmethod
     def handle_flow_update(message: dict, entities: list[T], flow_sensor_type: Type[T] | None, online_sensor_type: Type[T] | None) -> None:
         """Handle flow_updated messages."""
@@ -88,7 +151,7 @@ class LeakomaticMessageHandler:
     @staticmethod
     def handle_quick_test_update(message: dict, entities: list[T], quick_test_sensor_type: Type[T] | None, online_sensor_type: Type[T] | None) -> None:
         """Handle quick_test_updated messages."""
-        data = message.get("message", {}).get("data", {})
+        data = (message.get("message") or {}).get("data") or {}
         value = data.get("value")
         LeakomaticMessageHandler._update_matching_entities(
             message, entities, quick_test_sensor_type, online_sensor_type,
@@ -98,7 +161,7 @@ class LeakomaticMessageHandler:
     @staticmethod
     def handle_tightness_test_update(message: dict, entities: list[T], tightness_sensor_type: Type[T] | None, online_sensor_type: Type[T] | None) -> None:
         """Handle tightness_test_updated messages."""
-        data = message.get("message", {}).get("data", {})
+        data = (message.get("message") or {}).get("data") or {}
         value = data.get("value")
         LeakomaticMessageHandler._update_matching_entities(
             message, entities, tightness_sensor_type, online_sensor_type,
@@ -118,16 +181,6 @@ class LeakomaticMessageHandler:
         # Do nothing for ping messages, as they cannot be tied to a specific device and logging would flood the logs
         #TODO: Consider adding logic to reconnect to the websocket if no ping is received for a while
 
-    @staticmethod
-    def handle_device_offline(message: dict, entities: list[T], online_sensor_type: Type[T] | None) -> None:
-        """Handle device_offline messages."""
-        _LOGGER.debug("Received device_offline message")
-        LeakomaticMessageHandler._update_matching_entities(
-            message, entities, None, online_sensor_type,
-            update_data={"is_online": False},
-            update_last_seen=False
-        )
-
     @staticmethod
     def handle_alarm_triggered(message: dict, entities: list[T], alarm_sensor_types: tuple[Type[T], ...] | None, online_sensor_type: Type[T] | None) -> None:
         """Handle alarm_triggered messages."""
@@ -138,43 +191,40 @@ class LeakomaticMessageHandler:
     @staticmethod
     def handle_default(message: dict, entities: list[T]) -> None:
         """Handle any other message type."""
-        msg_type = message.get("type", message.get('message', {}).get('operation', 'unknown'))
-        _LOGGER.debug("%s: Received unhandled message type: %s", self._device_id, msg_type)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            msg_type = message.get("type") or (message.get("message") or {}).get("operation") or "unknown"
+            _LOGGER.debug("Received unhandled message type: %s", msg_type)
 
 class MessageHandlerRegistry(Generic[T]):
     """Registry for WebSocket message handlers."""
     
     def __init__(self) -> None:
         """Initialize the registry."""
-        self._handlers: Dict[str, Callable[[dict, list[T]], None]] = {}
-        self._default_handler: Optional[Callable[[dict, list[T]], None]] = None
+        self._handlers: Dict[str, Callable[[dict, Entities[T]], None]] = {}
+        self._default_handler: Optional[Callable[[dict, Entities[T]], None]] = None
         self._registered_types: set[str] = set()  # Track which message types we care about
+        # Bound once so the per-message lookup skips the attribute fetch
+        self._get_handler = self._handlers.get
     
-    def register(self, message_type: str, handler: Callable[[dict, list[T]], None]) -> None:
+    def register(self, message_type: str, handler: Callable[[dict, Entities[T]], None]) -> None:
         """Register a handler for a specific message type."""
         self._handlers[message_type] = handler
         self._registered_types.add(message_type)  # Add to set of types we care about
     
-    def register_default(self, handler: Callable[[dict, list[T]], None]) -> None:
+    def register_default(self, handler: Callable[[dict, Entities[T]], None]) -> None:
         """Register a default handler for unhandled message types."""
         self._default_handler = handler
     
-    def handle_message(self, message: dict, entities: list[T]) -> None:
+    def handle_message(self, message: dict, entities: Entities[T]) -> None:
         """Handle a WebSocket message using the appropriate handler."""
-        # Extract message type using the same logic as legacy code
-        msg_type = ""
-        
-        # First try to get the type from the message's operation
-        if 'message' in message and 'operation' in message['message']:
-            msg_type = message['message']['operation']
-        # Then try the type field
-        elif 'type' in message:
-            msg_type = message['type']
-        
-        # Get the appropriate handler
-        handler = self._handlers.get(msg_type)
-        if handler is None:
-            handler = self._default_handler
+        # The operation of a channel message takes precedence over the type field
+        body = message.get("message")
+        msg_type = (
+            (body.get("operation") if isinstance(body, dict) else None)
+            or message.get("type")
+            or ""
+        )
+        handler = self._get_handler(msg_type, self._default_handler)
         
         if handler is not None:
             handler(message, entities)
@@ -188,9 +238,14 @@ class LeakomaticEntity:
     This class implements common functionality shared between all Leakomatic entities.
     """
 
+    # Shared by every Leakomatic entity, so set once on the class rather than per instance
+    _attr_has_entity_name = True
+    _attr_entity_registry_enabled_default = True
+    _attr_should_poll = False  # No polling needed with WebSocket
+
     def __init__(
         self,
-        device_info: dict[str, Any],
+        device_info: DeviceInfo,
         device_id: str,
         device_data: dict[str, Any] | None,
         *,
@@ -198,29 +253,18 @@ class LeakomaticEntity:
         icon: str,
     ) -> None:
         """Initialize the entity."""
-        self._device_info = device_info
+        # Served by the base entity's device_info property without a per-read override
+        self._attr_device_info = device_info
         self._device_id = device_id
         self._device_data = device_data or {}
         
-        self._attr_has_entity_name = True
         self._attr_unique_id = f"{device_id}_{key}"
         self._attr_icon = icon
-        self._attr_entity_registry_enabled_default = True
-        self._attr_should_poll = False  # No polling needed with WebSocket
         self._attr_translation_key = key
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return the device info."""
-        return self._device_info
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        return {}
-
     def handle_update(self, data: dict[str, Any]) -> None:
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        _LOGGER.debug("%s: value updated", self._device_id) 
\ No newline at end of file
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s: value updated", self._device_id) 
\ No newline at end of file
@@ -48,24 +48,9 @@ class DeviceMode(Enum):
     HOME = 0  # Home mode - normal operation
     AWAY = 1  # Away mode - reduced sensitivity
     PAUSE = 2  # Pause mode - monitoring paused
-    
-    @classmethod
-    def from_string(cls, mode_str: str) -> int:
-        """Convert a string mode to its numeric value.
-        
-        Args:
-            mode_str: The string mode (home, away, pause)
-            
-        Returns:
-            int: The numeric value (0, 1, 2)
-            
-        Raises:
-            ValueError: If the mode string is invalid
-        """
-        try:
-            return cls[mode_str.upper()].value
-        except KeyError:
-            raise ValueError(f"Invalid mode: {mode_str}. Must be one of: home, away, pause")
+
+# Numeric API value for each mode string used by the service and the UI (home, away, pause)
+MODE_VALUES = {mode.name.lower(): mode.value for mode in DeviceMode}
 
 class TestState(Enum):
     """Test sensor states.
@@ -142,6 +127,14 @@ LONG_RETRY_INTERVAL = 43200  # 12 hours in seconds
 # Health check interval
 HEALTH_CHECK_INTERVAL = 300  # 5 minutes
 
+# WebSocket message batching: messages received within this window after the
+# first one are coalesced before being passed to the platforms
+WS_BATCH_WINDOW = 0.1  # seconds
+
+# Maximum number of received WebSocket messages waiting for the drain loop,
+# further messages are dropped until it catches up
+WS_QUEUE_MAXSIZE = 1000
+
 # Stale connection detection: ActionCable pings ~every 3s, so this much total
 # silence on an otherwise-open socket means the connection is dead.
 STALE_CONNECTION_TIMEOUT = 120  # seconds of total silence -> reconnect
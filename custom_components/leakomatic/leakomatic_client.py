@@ -13,6 +13,7 @@ import re
 import ssl
 import asyncio
 import random
+import time
 from typing import Any, Optional, Callable, Dict
 from datetime import datetime, timedelta, timezone
 
@@ -22,17 +23,31 @@ from bs4 import BeautifulSoup
 import urllib.parse
 import json
 
+try:
+    # orjson ships with Home Assistant and decodes websocket frames several times faster
+    from orjson import loads as json_loads
+except ImportError:  # Standalone use without Home Assistant
+    json_loads = json.loads
+
 from .const import (
     LOGGER_NAME, START_URL, LOGIN_URL, STATUS_URL, WEBSOCKET_URL,
     MessageType, DEFAULT_HEADERS, WEBSOCKET_HEADERS, MAX_QUICK_RETRIES, INITIAL_RETRY_DELAY,
     MAX_RETRY_DELAY, RETRY_BACKOFF_FACTOR, MEDIUM_RETRY_INTERVAL, MAX_MEDIUM_RETRIES,
     LONG_RETRY_INTERVAL, STALE_CONNECTION_TIMEOUT,
     ERROR_AUTH_TOKEN_MISSING, ERROR_INVALID_CREDENTIALS, ERROR_XSRF_TOKEN_MISSING, ERROR_NO_DEVICES_FOUND,
-    XSRF_TOKEN_HEADER, DeviceMode, XSRF_TOKEN_PATTERN
+    XSRF_TOKEN_HEADER, MODE_VALUES, XSRF_TOKEN_PATTERN
 )
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
+# Message types checked for every received websocket message, as plain strings
+# so the receive loop does not go through the enum member lookups
+_WELCOME = MessageType.WELCOME.value
+_PING = MessageType.PING.value
+_CONFIRM_SUBSCRIPTION = MessageType.CONFIRM_SUBSCRIPTION.value
+_CONTROL_MESSAGE_TYPES = frozenset((_PING, _CONFIRM_SUBSCRIPTION, _WELCOME))
+_MESSAGE_TYPES = frozenset(msg_type.value for msg_type in MessageType)
+
 # Create SSL context at module level
 ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
 ssl_context.load_default_certs()
@@ -63,6 +78,8 @@ class LeakomaticClient:
         self._error_code: Optional[str] = None
         self._xsrf_token: Optional[str] = None
         self._cookies: Optional[aiohttp.CookieJar] = None
+        # Serializes re-authentication so concurrent requests log in only once
+        self._auth_lock = asyncio.Lock()
         self._ws_running = True
         self._ws_callbacks: list[Callable[[dict], None]] = []
         self._device_data_cache: dict[str, Any] = {}
@@ -70,7 +87,7 @@ class LeakomaticClient:
         
         # New attributes for persistent reconnection
         self._ws_connected = True
-        self._last_ws_message: Optional[datetime] = None
+        self._last_ws_message: Optional[float] = None  # time.monotonic() of the last message
         self._ws_token_expiry: Optional[datetime] = None
         self._reconnection_phase = 1  # 1=quick, 2=medium, 3=long
         self._connectivity_callbacks: list[Callable[[bool, int], None]] = []
@@ -343,13 +360,15 @@ class LeakomaticClient:
         """
         now = datetime.now(tz=timezone.utc)
         
-        # If no device_id specified and we have multiple devices, return data for all devices
+        # If no device_id specified and we have multiple devices, fetch data for all devices concurrently
         if device_id is None and len(self._device_ids) > 1:
-            result = {}
-            for dev_id in self._device_ids:
-                data = await self.async_get_device_data(dev_id)
-                if data:
-                    result[dev_id] = data
+            # Authenticate once before fanning out, so the concurrent requests
+            # share the same session instead of each logging in
+            if not await self._ensure_authenticated():
+                return None
+            device_ids = list(self._device_ids)
+            results = await asyncio.gather(*(self.async_get_device_data(dev_id) for dev_id in device_ids))
+            result = {dev_id: data for dev_id, data in zip(device_ids, results) if data}
             return result if result else None
             
         # Use first device if none specified (backward compatibility)
@@ -497,12 +516,16 @@ class LeakomaticClient:
         Returns:
             bool: True if the client is authenticated, False otherwise.
         """
-        if not self._xsrf_token:
-            _LOGGER.debug("No XSRF token available, reconnecting to Leakomatic API")
-            auth_success = await self.async_authenticate()
-            if not auth_success:
-                _LOGGER.error("Failed to reconnect to Leakomatic API")
-                return False
+        if self._xsrf_token:
+            return True
+        async with self._auth_lock:
+            # Another request may have authenticated while we waited for the lock
+            if not self._xsrf_token:
+                _LOGGER.debug("No XSRF token available, reconnecting to Leakomatic API")
+                auth_success = await self.async_authenticate()
+                if not auth_success:
+                    _LOGGER.error("Failed to reconnect to Leakomatic API")
+                    return False
         return True
 
     def _extract_message_type(self, parsed_response: dict) -> str:
@@ -516,16 +539,17 @@ class LeakomaticClient:
         """
         # Special messages that use the top-level 'type' key
         msg_type = parsed_response.get("type")
-        if msg_type in (MessageType.PING.value, MessageType.CONFIRM_SUBSCRIPTION.value, MessageType.WELCOME.value):
+        if msg_type in _CONTROL_MESSAGE_TYPES:
             return msg_type
             
         # All other operational messages use 'message.operation'
-        operation = parsed_response.get("message", {}).get("operation")
-        if operation in [msg_type.value for msg_type in MessageType]:
+        body = parsed_response.get("message")
+        operation = body.get("operation") if isinstance(body, dict) else None
+        if operation in _MESSAGE_TYPES:
             return operation
             
         # If we have a message but no operation, it might be a data update
-        if "message" in parsed_response and "data" in parsed_response["message"]:
+        if isinstance(body, dict) and "data" in body:
             return "data_update"
             
         return ""
@@ -627,39 +651,37 @@ class LeakomaticClient:
         Returns:
             bool: True if the mode was changed successfully for all specified devices, False otherwise.
         """
-        try:
-            # Convert the string mode to a numeric value using the DeviceMode enum
-            numeric_mode = DeviceMode.from_string(mode)
-            
-            # If no device_id specified and we have multiple devices, change mode for all devices
-            if device_id is None and len(self._device_ids) > 1:
-                results = []
-                for dev_id in self._device_ids:
-                    result = await self.async_change_mode(mode, dev_id)
-                    results.append(result)
-                return all(results)
-            
-            # Use first device if none specified (backward compatibility)
-            device_id = device_id or self.device_id
-            if not device_id:
-                return self._handle_error("Cannot change mode - no device configured", return_value=False, level="warning")
-                
-            # Prepare the data for the request
-            data = {
-                "mode": numeric_mode
-            }
-            
-            result = await self._async_make_request(
-                endpoint="change_mode.json",
-                data=data,
-                operation=f"change mode to {mode}",
-                device_id=device_id
-            )
+        # Convert the string mode to its numeric API value
+        numeric_mode = MODE_VALUES.get(mode.lower())
+        if numeric_mode is None:
+            return self._handle_error(f"Invalid mode: {mode}. Must be one of: {', '.join(MODE_VALUES)}", return_value=False, level="warning")
+        
+        # If no device_id specified and we have multiple devices, change mode for all devices
+        if device_id is None and len(self._device_ids) > 1:
+            results = []
+            for dev_id in self._device_ids:
+                result = await self.async_change_mode(mode, dev_id)
+                results.append(result)
+            return all(results)
+        
+        # Use first device if none specified (backward compatibility)
+        device_id = device_id or self.device_id
+        if not device_id:
+            return self._handle_error("Cannot change mode - no device configured", return_value=False, level="warning")
             
-            return result
-                
-        except ValueError as err:
-            return self._handle_error(str(err), return_value=False, level="warning")
+        # Prepare the data for the request
+        data = {
+            "mode": numeric_mode
+        }
+        
+        result = await self._async_make_request(
+            endpoint="change_mode.json",
+            data=data,
+            operation=f"change mode to {mode}",
+            device_id=device_id
+        )
+        
+        return result
 
     async def async_reset_alarms(self, device_id: Optional[str] = None) -> bool:
         """Reset all alarms on the Leakomatic device.
@@ -707,6 +729,9 @@ class LeakomaticClient:
     async def _persistent_websocket_connection(self, initial_ws_token: str) -> None:
         """Maintain a persistent WebSocket connection with multi-phase retry strategy."""
         ws_token = initial_ws_token
+        # The initial token was just fetched, so don't refresh it on the first attempt
+        if not self._ws_token_expiry:
+            self._ws_token_expiry = datetime.now(tz=timezone.utc) + timedelta(hours=24)
         quick_retry_count = 0
         medium_retry_count = 0
         retry_delay = INITIAL_RETRY_DELAY
@@ -834,7 +859,7 @@ class LeakomaticClient:
                 # reconnection rather than a connection failure.
                 connected = True
                 self._ws_connected = True
-                self._last_ws_message = datetime.now(tz=timezone.utc)
+                self._last_ws_message = time.monotonic()
                 self._reconnection_phase = 1
                 self._notify_connectivity_callbacks(True, self._reconnection_phase)
                 _LOGGER.info("WebSocket connection established successfully")
@@ -844,27 +869,28 @@ class LeakomaticClient:
                     try:
                         # Use a timeout for receiving messages to prevent blocking
                         response = await asyncio.wait_for(websocket.recv(), timeout=30)
-                        parsed_response = json.loads(response)
+                        parsed_response = json_loads(response)
                         
                         # Update last message timestamp
-                        self._last_ws_message = datetime.now(tz=timezone.utc)
+                        self._last_ws_message = time.monotonic()
 
                         # Extract message type
                         msg_type = self._extract_message_type(parsed_response)
 
                         # Handle different message types
-                        if msg_type == MessageType.WELCOME.value:
+                        if msg_type == _WELCOME:
                             _LOGGER.debug("Received welcome message")
-                        elif msg_type == MessageType.PING.value:
+                        elif msg_type == _PING:
                             # Skip logging for ping messages
                             pass
-                        elif msg_type == MessageType.CONFIRM_SUBSCRIPTION.value:
+                        elif msg_type == _CONFIRM_SUBSCRIPTION:
                             _LOGGER.debug("Subscription confirmed")
                         else:
                             # For all other message types, call all callbacks
                             if msg_type:
-                                device_identifier = parsed_response.get('message', {}).get('device', 'unknown')
-                                _LOGGER.debug("Device %s received message %s", device_identifier, msg_type)
+                                if _LOGGER.isEnabledFor(logging.DEBUG):
+                                    device_identifier = (parsed_response.get("message") or {}).get("device", "unknown")
+                                    _LOGGER.debug("Device %s received message %s", device_identifier, msg_type)
                                 # Call all registered callbacks
                                 for callback in self._ws_callbacks:
                                     try:
@@ -878,9 +904,9 @@ class LeakomaticClient:
                         # No message (not even an ActionCable ping) within the
                         # window. If the socket has been silent for too long it
                         # is stale/stuck - break out to force a reconnect.
-                        if self._last_ws_message and (
-                            datetime.now(tz=timezone.utc) - self._last_ws_message
-                            > timedelta(seconds=STALE_CONNECTION_TIMEOUT)
+                        if self._last_ws_message is not None and (
+                            time.monotonic() - self._last_ws_message
+                            > STALE_CONNECTION_TIMEOUT
                         ):
                             _LOGGER.warning(
                                 "No WebSocket messages for %ds, connection stale - reconnecting",
@@ -7,6 +7,7 @@ It provides select entities for:
 from __future__ import annotations
 
 import logging
+from functools import partial
 from typing import Any, Callable, Dict, Optional
 
 from homeassistant.components.select import (
@@ -57,7 +58,7 @@ message_registry = MessageHandlerRegistry[LeakomaticSelect]()
 # Define message handlers
 def handle_device_update(message: dict, sensors: list[LeakomaticSelect]) -> None:
     """Handle device_updated messages."""
-    data = message.get("message", {}).get("data", {})
+    data = (message.get("message") or {}).get("data") or {}
     # Update all relevant sensors
     for sensor in sensors:
         if isinstance(sensor, ModeSelect):
@@ -82,11 +83,11 @@ async def async_setup_entry(
         config_entry: The config entry to set up select entities for
         async_add_entities: Callback to register new entities
     """
-    domain_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id, {})
-    client = domain_data.get("client")
-    device_ids = domain_data.get("device_ids", [])
-    device_entries = domain_data.get("device_entries", {})
-    device_infos = domain_data.get("device_infos", {})
+    domain_data = hass.data[DOMAIN][config_entry.entry_id]
+    client = domain_data.client
+    device_ids = domain_data.device_ids
+    device_entries = domain_data.device_entries
+    device_infos = domain_data.device_infos
 
     _LOGGER.debug("Setting up Leakomatic select entities for config entry: %s", config_entry.entry_id)
     
@@ -94,15 +95,11 @@ async def async_setup_entry(
         _LOGGER.error("Missing client, device IDs, device entries, or device infos")
         return
     
-    # Get initial device data for all devices
-    device_data = await client.async_get_device_data()
+    # Get the initial device data fetched during integration setup
+    device_data = domain_data.device_data
     if not device_data:
         _LOGGER.error("Missing device data")
         return
-        
-    # If we got data for a single device, convert it to a dict
-    if isinstance(device_data, dict) and "device_identifier" in device_data:
-        device_data = {device_ids[0]: device_data}
     
     # Create select entities for each device
     all_select_entities = []
@@ -128,16 +125,9 @@ async def async_setup_entry(
     
     async_add_entities(all_select_entities)
 
-    # Register callback for WebSocket updates
-    @callback
-    def handle_ws_message(message: dict) -> None:
-        """Handle WebSocket messages."""
-        message_registry.handle_message(message, all_select_entities)
-
-    # Store the callback in hass.data for the WebSocket client to use
-    if "ws_callbacks" not in domain_data:
-        domain_data["ws_callbacks"] = []
-    domain_data["ws_callbacks"].append(handle_ws_message)
+    # Store the callback for WebSocket updates in hass.data for the WebSocket client to use,
+    # binding the entities directly to the registry to skip a forwarding call per message
+    domain_data.ws_callbacks.append(partial(message_registry.handle_message, entities=all_select_entities))
 
 
 class ModeSelect(LeakomaticSelect):
@@ -147,7 +137,7 @@ class ModeSelect(LeakomaticSelect):
     It is updated through WebSocket updates and can be used to change the mode.
     
     Attributes:
-        _device_info: Information about the physical device
+        _attr_device_info: Information about the physical device
         _device_id: The unique identifier of the device
         _attr_name: The name of the select entity
         _attr_unique_id: The unique identifier for this select entity
@@ -13,6 +13,7 @@ The sensors are updated through real-time WebSocket updates.
 from __future__ import annotations
 
 import logging
+from functools import partial
 from typing import Any, Callable, Dict, Optional
 
 from homeassistant.components.sensor import (
@@ -127,7 +128,7 @@ def handle_water_meter_calibration(message: dict, sensors: list[LeakomaticSensor
 
 def handle_analog_sensor_message(message: dict, sensors: list[LeakomaticSensor]) -> None:
     """Handle analog_sensor_message messages."""
-    data = message.get("message", {}).get("data", {})
+    data = (message.get("message") or {}).get("data") or {}
     sensor_type = data.get("sensor_type")
     connected = data.get("connected")
     value = data.get("value")
@@ -179,25 +180,21 @@ async def async_setup_entry(
     _LOGGER.debug("Setting up Leakomatic sensor for config entry: %s", config_entry.entry_id)
     
     # Get the client and device IDs from hass.data
-    domain_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id, {})
-    client = domain_data.get("client")
-    device_ids = domain_data.get("device_ids", [])
-    device_entries = domain_data.get("device_entries", {})
-    device_infos = domain_data.get("device_infos", {})
+    domain_data = hass.data[DOMAIN][config_entry.entry_id]
+    client = domain_data.client
+    device_ids = domain_data.device_ids
+    device_entries = domain_data.device_entries
+    device_infos = domain_data.device_infos
     
     if not client or not device_ids or not device_entries or not device_infos:
         _LOGGER.error("Missing client, device IDs, device entries, or device infos")
         return
     
-    # Get initial device data for all devices
-    device_data = await client.async_get_device_data()
+    # Get the initial device data fetched during integration setup
+    device_data = domain_data.device_data
     if not device_data:
         _LOGGER.error("Missing device data")
         return
-        
-    # If we got data for a single device, convert it to a dict
-    if isinstance(device_data, dict) and "device_identifier" in device_data:
-        device_data = {device_ids[0]: device_data}
     
     # Create sensors for each device
     all_sensors = []
@@ -232,16 +229,9 @@ async def async_setup_entry(
     
     async_add_entities(all_sensors)
     
-    # Register callback for WebSocket updates
-    @callback
-    def handle_ws_message(message: dict) -> None:
-        """Handle WebSocket messages."""
-        message_registry.handle_message(message, all_sensors)
-
-    # Store the callback in hass.data for the WebSocket client to use
-    if "ws_callbacks" not in domain_data:
-        domain_data["ws_callbacks"] = []
-    domain_data["ws_callbacks"].append(handle_ws_message)
+    # Store the callback for WebSocket updates in hass.data for the WebSocket client to use,
+    # binding the entities directly to the registry to skip a forwarding call per message
+    domain_data.ws_callbacks.append(partial(message_registry.handle_message, entities=all_sensors))
 
 
 class QuickTestIndexSensor(LeakomaticSensor):
@@ -292,7 +282,8 @@ class QuickTestIndexSensor(LeakomaticSensor):
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
 
 
 class FlowDurationSensor(LeakomaticSensor):
@@ -352,7 +343,8 @@ class FlowDurationSensor(LeakomaticSensor):
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
 
 
 class SignalStrengthSensor(LeakomaticSensor):
@@ -403,7 +395,8 @@ class SignalStrengthSensor(LeakomaticSensor):
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
 
 
 class LongestTightnessPeriodSensor(LeakomaticSensor):
@@ -458,7 +451,8 @@ class LongestTightnessPeriodSensor(LeakomaticSensor):
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
 
 
 class AlarmTestSensor(LeakomaticEntity, SensorEntity):
@@ -532,7 +526,8 @@ class AlarmTestSensor(LeakomaticEntity, SensorEntity):
                 self._device_data = data
                 self.async_write_ha_state()
                 # Add state change log message
-                log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
 
 
 class FlowTestSensor(AlarmTestSensor):
@@ -803,7 +798,8 @@ class TemperatureSensor(LeakomaticSensor):
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
 
 
 class PressureSensor(LeakomaticSensor):
@@ -858,4 +854,5 @@ class PressureSensor(LeakomaticSensor):
         """Handle updated data from WebSocket."""
         self._device_data = data
         self.async_write_ha_state()
-        log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
\ No newline at end of file
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            log_with_entity(_LOGGER, logging.DEBUG, self, "Value updated: %s", self.native_value)
\ No newline at end of file